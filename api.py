@@ -1,17 +1,25 @@
-import json
+import asyncio
+import functools
 import logging
 import os
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from pathlib import PurePosixPath
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 from uuid import uuid4
 
+import numpy as np
+import orjson
 import pandas as pd
-from cachetools import LRUCache
+import pyarrow as pa
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Cookie,
     Depends,
     FastAPI,
@@ -23,24 +31,38 @@ from fastapi import (
     UploadFile,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse
-from gradio_client import Client
-from pydantic import BaseModel, ConfigDict, constr
+from fastapi.responses import (
+    FileResponse,
+    ORJSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from pandas.api.types import is_float_dtype
+from pydantic import BaseModel, ConfigDict, StringConstraints
+from starlette_compress import CompressMiddleware, add_compress_type
 
 from docs import description, tags_metadata
-from services.file_service import cleanup_temp_files, download_as_csv
+from services.file_service import TEMP_DATA_DIR, cleanup_temp_files, download_as_file
 from services.file_service import new_study_choices as get_study_choices_service
 from services.mendeley_service import MendeleyService
 from services.rag_service import process_multi_input
 from services.zotero_service import get_study_info as get_study_info_service
 from services.zotero_service import process_zotero_library_items
+from utils.session_store import SQLiteSessionStore
 from utils.zotero_pdf_processory import (
+    PdfUpload,
     export_dataframe_to_csv,
     process_multiple_pdfs,
     stuff_summarise_document_bullets,
     update_summary_columns,
 )
 
+# Use uvloop as the asyncio event loop implementation where it is available
+if sys.platform != "win32":
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # Initialize the Mendeley service
 mendely_client_id = os.getenv("MENDELEY_CLIENT_ID")
 medeley_client_secret = os.getenv("MENDELEY_SECRET_KEY")
@@ -51,16 +73,56 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# GRADIO_URL = os.getenv("GRADIO_URL", "http://localhost:7860/")
-# logger.info(f"GRADIO_URL: {GRADIO_URL}")
-# client = Client(GRADIO_URL)
-
 UPLOAD_DIR = "zotero_data/uploads"
+# Read uploads in 1 MiB chunks to amortise syscalls without buffering whole files
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Uploads up to Starlette's multipart spool size are still in memory, so they
+# are processed from memory instead of being written to UPLOAD_DIR first
+UPLOAD_IN_MEMORY_MAX_SIZE = 1024 * 1024
+# Rows serialised per chunk when streaming CSV downloads
+CSV_STREAM_CHUNK_ROWS = 10_000
+# Dedicated threads for upload writes, so they never queue behind long-running
+# PDF processing jobs on the default executor
+UPLOAD_IO_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upload-io")
+# Threads behind asyncio.to_thread. The service calls spend most of their time
+# waiting on Zotero and the LLM, so allow far more than asyncio's default of
+# min(32, cpu_count + 4) to be in flight at once.
+BLOCKING_CALL_WORKERS = int(os.getenv("BLOCKING_CALL_WORKERS", "64"))
+# How long a request waits for a study variable extraction before giving up
+STUDY_VARIABLES_TIMEOUT_SECONDS = float(
+    os.getenv("STUDY_VARIABLES_TIMEOUT_SECONDS", "300")
+)
+# How often a waiting request checks whether its client has gone away
+DISCONNECT_POLL_SECONDS = 0.5
 
 # Create upload directory if it doesn't exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+
+def orjson_default(obj: Any) -> Any:
+    """Serialise values orjson does not handle natively, such as object arrays."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class NumpyORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also accepts mixed-type (object dtype) numpy arrays.
+
+    Numeric arrays are written by orjson directly; object arrays, which it
+    cannot serialise natively, fall back to a list conversion.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
 app = FastAPI(
+    default_response_class=NumpyORJSONResponse,
     title="ACRES RAG API",
     description=description,
     openapi_tags=tags_metadata,
@@ -68,6 +130,13 @@ app = FastAPI(
 
 origins = ["*"]
 
+# Compress large JSON tables and CSV downloads. Added before CORS so that the
+# CORS middleware stays outermost and its headers wrap the compressed body.
+# zstd, Brotli or gzip is negotiated from Accept-Encoding; only text-like types
+# are compressed, so Parquet and Feather exports are sent as they are.
+add_compress_type("text/csv")
+app.add_middleware(CompressMiddleware, minimum_size=1024, zstd_level=3)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -78,10 +147,32 @@ app.add_middleware(
 
 router = APIRouter()
 
-# Simple in-memory cache for demonstration
-session_cache = {}
+# Sessions expire an hour after they are created and the cache is bounded, so
+# abandoned sessions do not accumulate for the lifetime of the process
+SESSION_TTL_SECONDS = 3600
+# With SESSION_DB_PATH set, sessions live in a SQLite file shared by all worker
+# processes; otherwise they are kept in memory and only one worker can be used
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH")
+if SESSION_DB_PATH:
+    # The temp data directory is deleted wholesale after uploads, which would
+    # drop every session and leave workers on different database files
+    temp_data_dir = os.path.realpath(TEMP_DATA_DIR)
+    session_db_path = os.path.realpath(SESSION_DB_PATH)
+    if os.path.commonpath([session_db_path, temp_data_dir]) == temp_data_dir:
+        raise RuntimeError(
+            f"SESSION_DB_PATH must not be inside {TEMP_DATA_DIR}, which is cleaned up"
+        )
+    session_cache = SQLiteSessionStore(SESSION_DB_PATH, ttl=SESSION_TTL_SECONDS)
+else:
+    session_cache = TTLCache(maxsize=10_000, ttl=SESSION_TTL_SECONDS)
+
+# Short-lived cache for idempotent study lookups. Handlers run on the event
+# loop thread, so no lock is needed around it.
+response_cache = TTLCache(maxsize=512, ttl=300)
 
-cache = LRUCache(maxsize=100)
+# Study variable extractions in progress, so that identical requests arriving
+# while one is running wait for it instead of starting their own
+inflight_extractions: Dict[tuple, asyncio.Task] = {}
 
 
 class StudyVariables(str, Enum):
@@ -96,10 +187,14 @@ class PromptType(str, Enum):
     evidence_based = "Evidence-based"
 
 
+# Stripped, non-empty string; validated entirely in pydantic-core
+NonEmptyStr = Annotated[str, StringConstraints(min_length=1, strip_whitespace=True)]
+
+
 class StudyVariableRequest(BaseModel):
     study_variable: Union[StudyVariables, str]
     prompt_type: PromptType
-    text: constr(min_length=1, strip_whitespace=True)  # type: ignore
+    text: NonEmptyStr
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -108,34 +203,33 @@ class DownloadCSV(BaseModel):
     headers: List[str]
     data: List[List[Any]]
     metadata: Optional[Any] = None  # Metadata is nullable
+    format: Literal["csv", "parquet", "feather"] = "csv"
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class Study(BaseModel):
-    study_name: constr(min_length=1, strip_whitespace=True)  # type: ignore
+    study_name: NonEmptyStr
 
     model_config = ConfigDict(from_attributes=True)
 
 
-class ZoteroCredentials(BaseModel):
-    library_id: constr(min_length=1, strip_whitespace=True)  # type: ignore
-    api_access_key: constr(min_length=1, strip_whitespace=True)  # type: ignore
+# Media types of the formats /download_csv can export to
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+}
 
-    model_config = ConfigDict(from_attributes=True)
 
-
-class UploadPdfFiles(BaseModel):
-    study_variables: constr(min_length=1, strip_whitespace=True)  # type: ignore
-    study_name: constr(min_length=1, strip_whitespace=True)  # type: ignore
-
-    model_config = ConfigDict(from_attributes=True)
-
-
-class DataFrameResponse(BaseModel):
-    headers: List[str]
-    data: List[List[Any]]
-    metadata: Optional[Dict[str, Optional[List[Any]]]] = None
+def infinite_mask(df: pd.DataFrame) -> np.ndarray:
+    """Boolean array marking the infinite cells of df; only float columns can hold them."""
+    mask = np.zeros(df.shape, dtype=bool)
+    floats = [i for i, dtype in enumerate(df.dtypes) if is_float_dtype(dtype)]
+    if floats:
+        values = df.iloc[:, floats].to_numpy(dtype=float, na_value=np.nan)
+        mask[:, floats] = np.isinf(values)
+    return mask
 
 
 def format_dataframe(
@@ -154,18 +248,25 @@ def format_dataframe(
     # Convert headers
     headers = df.columns.tolist()
 
-    # Convert data to nested list format
-    data = df.values.tolist()
+    # Keep the data as an array; NumpyORJSONResponse writes it without an
+    # intermediate list of lists for numeric frames. One missing-value mask
+    # serves both the None replacement and the null counts.
+    na_mask = df.isna().to_numpy()
+    invalid = na_mask | infinite_mask(df)
+    data = df.to_numpy()
+    if invalid.any():
+        data = np.where(invalid, None, data)
 
     # Create response
     response = {"headers": headers, "data": data, "metadata": None}
 
     # Add metadata if requested
     if include_metadata:
+        # The index and counts stay arrays, like the data, for orjson to write
         metadata = {
-            "dtypes": df.dtypes.astype(str).tolist(),
-            "index": df.index.tolist(),
-            "null_counts": df.isnull().sum().tolist(),
+            "dtypes": [str(dtype) for dtype in df.dtypes],
+            "index": df.index.to_numpy(),
+            "null_counts": na_mask.sum(axis=0),
             "shape": list(df.shape),
         }
         response["metadata"] = metadata
@@ -173,32 +274,115 @@ def format_dataframe(
     return response
 
 
+def to_arrow_array(values, dtype: Optional[str] = None) -> pa.Array:
+    """Build an Arrow array, skipping type inference for known float columns.
+
+    Only float dtypes are applied directly: Arrow silently truncates floats
+    passed as an integer type, but converting ints to float64 is exact. Values
+    that do not fit (e.g. edited by the client) are converted with inference.
+    """
+    try:
+        numpy_dtype = np.dtype(dtype) if dtype else None
+    except TypeError:
+        numpy_dtype = None
+    if numpy_dtype is not None and numpy_dtype.kind == "f":
+        try:
+            return pa.array(values, type=pa.from_numpy_dtype(numpy_dtype))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    return pa.array(values)
+
+
 def json_to_dataframe(json_data):
     """
     Converts a JSON object into a pandas DataFrame.
 
     Args:
-        json_data (dict or str): The JSON object or JSON string to convert. Must include 'headers' and 'data' keys.
+        json_data (DownloadCSV, str or bytes): The payload model or a JSON document to convert.
+            Must include 'headers' and 'data'.
 
     Returns:
         pd.DataFrame: A pandas DataFrame created from the JSON data.
     """
     # If the input is a JSON string, parse it into a dictionary
     # Extract headers and data
-    if isinstance(json_data, str):
-        json_data = json.loads(json_data)
+    if isinstance(json_data, (str, bytes)):
+        json_data = orjson.loads(json_data)
         headers = json_data.get("headers", [])
         data = json_data.get("data", [])
+        metadata = json_data.get("metadata")
     else:
         headers = json_data.headers
         data = json_data.data
-
-    # Convert to DataFrame
-    dataframe = pd.DataFrame(data, columns=headers)
+        metadata = json_data.metadata
+
+    # Column dtypes reported by format_dataframe, if the client sent them back
+    dtypes = metadata.get("dtypes") if isinstance(metadata, dict) else None
+    if not isinstance(dtypes, list) or len(dtypes) != len(headers):
+        dtypes = [None] * len(headers)
+
+    # Only rows that are lists with one cell per header go through Arrow;
+    # anything else goes to pandas, which rejects malformed rows itself
+    well_formed = all(
+        isinstance(row, (list, tuple)) and len(row) == len(headers) for row in data
+    )
+    if not well_formed:
+        return pd.DataFrame(data, columns=headers)
+
+    # Convert to DataFrame through Arrow, which builds each column from a
+    # homogeneous sequence instead of inferring types cell by cell
+    try:
+        columns = zip(*data, strict=True) if data else [[] for _ in headers]
+        table = pa.Table.from_arrays(
+            [
+                to_arrow_array(column, dtype)
+                for column, dtype in zip(columns, dtypes, strict=True)
+            ],
+            names=headers,
+        )
+        dataframe = table.to_pandas(split_blocks=True, self_destruct=True)
+    except (ValueError, TypeError):
+        # Mixed-type columns go through pandas, which keeps its own handling
+        # and error messages for them
+        dataframe = pd.DataFrame(data, columns=headers)
 
     return dataframe
 
 
+def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace infinities and NaN with None so the frame serialises cleanly."""
+    # Build one mask of missing and infinite cells and apply it in a single pass
+    return df.mask(df.isna().to_numpy() | infinite_mask(df), None)
+
+
+def dataframe_to_table(df: pd.DataFrame) -> Dict[str, Any]:
+    """Convert a DataFrame to the headers/data table returned by the API.
+
+    The data is left as a numpy array, so the table must be returned through
+    NumpyORJSONResponse.
+    """
+    response = format_dataframe(df)
+    return {"headers": response["headers"], "data": response["data"]}
+
+
+def payload_to_dataframe(payload: DownloadCSV) -> pd.DataFrame:
+    """Build a cleaned DataFrame from a download payload."""
+    return clean_dataframe(json_to_dataframe(payload))
+
+
+def export_payload(payload: DownloadCSV) -> Optional[str]:
+    """Build a DataFrame from a download payload and export it to a file."""
+    return download_as_file(payload_to_dataframe(payload), payload.format)
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CSV_STREAM_CHUNK_ROWS):
+    """Yield a DataFrame as UTF-8 encoded CSV, a slice of rows at a time."""
+    # An empty frame still yields its header row
+    for start in range(0, max(len(df), 1), chunk_rows):
+        end = start + chunk_rows
+        yield df.iloc[start:end].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
 class ZoteroLibraryRequest(BaseModel):
     zotero_library_id: str
     zotero_api_access_key: str
@@ -209,15 +393,17 @@ def get_session_data(session_token: Optional[str] = Cookie(default=None)):
     Dependency to retrieve session data from the session cache.
     Raises HTTPException if session is missing or invalid.
     """
-    if not session_token or session_token not in session_cache:
+    # A single lookup, so an entry expiring between two calls cannot raise
+    session_data = session_cache.get(session_token) if session_token else None
+    if session_data is None:
         raise HTTPException(
             status_code=401, detail="Session not found. Please authenticate."
         )
-    return session_cache[session_token]
+    return session_data
 
 
 @router.post("/process_zotero_library_items", tags=["zotero"])
-def process_zotero_library_items_endpoint(
+async def process_zotero_library_items_endpoint(
     request: ZoteroLibraryRequest,
     response: Response,
     session_token: Optional[str] = Cookie(default=None),
@@ -270,27 +456,38 @@ def process_zotero_library_items_endpoint(
         # Use existing session token or create a new one
         if not session_token:
             session_token = str(uuid4())
-            response.set_cookie(key="session_token", value=session_token, httponly=True)
+            response.set_cookie(
+                key="session_token",
+                value=session_token,
+                httponly=True,
+                max_age=SESSION_TTL_SECONDS,
+            )
 
         # Store credentials in the session cache
-        session_cache[session_token] = {
+        session_data = {
             "zotero_library_id": request.zotero_library_id,
             "zotero_api_access_key": request.zotero_api_access_key,
         }
+        # The SQLite session store blocks on disk, so write off the event loop
+        await asyncio.to_thread(session_cache.__setitem__, session_token, session_data)
 
-        # Call your service function directly
-        message = process_zotero_library_items(
+        # Call the service function in-process, with this session's data as its
+        # credentials cache rather than one shared by every user
+        message = await asyncio.to_thread(
+            process_zotero_library_items,
             request.zotero_library_id,
             request.zotero_api_access_key,
-            cache=cache,  # You can pass session_cache[session_token] if your service supports it
+            cache=session_data,
         )
+        # The library may now contain new studies
+        response_cache.clear()
         return {"message": message, "session_token": session_token}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/get_study_info", tags=["zotero"])
-def get_study_info(study: Study, session_data: dict = Depends(get_session_data)):
+async def get_study_info(study: Study, session_data: dict = Depends(get_session_data)):
     """
     Retrieve detailed information about a specific study for the current session's Zotero library.
 
@@ -346,17 +543,117 @@ def get_study_info(study: Study, session_data: dict = Depends(get_session_data))
     study_name = study.study_name
 
     try:
-        # Call your own service logic
-        result = get_study_info_service(study_name)
+        key = ("get_study_info", study_name)
+        result = response_cache.get(key)
+        if result is None:
+            # Call your own service logic
+            result = await asyncio.to_thread(get_study_info_service, study_name)
+            response_cache[key] = result
         return {"result": result}
     except Exception as e:
         logger.error(f"Error in get_study_info: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get study info: {e}")
 
 
+@app.on_event("startup")
+async def configure_default_executor():
+    """Size the default executor used by asyncio.to_thread for blocking service calls."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(
+            max_workers=BLOCKING_CALL_WORKERS, thread_name_prefix="blocking-call"
+        )
+    )
+
+
+@app.on_event("startup")
+async def prefetch_study_info():
+    """Warm the response cache with the info of the built-in studies.
+
+    Enabled with PREFETCH_ON_STARTUP=1 so local runs and tests start immediately.
+    """
+    if os.getenv("PREFETCH_ON_STARTUP") != "1":
+        return
+
+    studies = [study.value for study in StudyVariables]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(get_study_info_service, study) for study in studies),
+        return_exceptions=True,
+    )
+    for study_name, result in zip(studies, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to prefetch study info for {study_name}: {result}")
+            continue
+        response_cache[("get_study_info", study_name)] = result
+
+
+async def extract_study_variables(
+    text: str, study_variable: str, prompt_type: str, credentials: Dict[str, str]
+) -> Dict[str, Any]:
+    """Run the study variable extraction and convert the result to a table."""
+    # Call the service logic in-process with the session's Zotero credentials
+    result_df, _ = await asyncio.to_thread(
+        process_multi_input, text, study_variable, prompt_type, credentials
+    )
+
+    # Convert DataFrame to dict for JSON response off the event loop
+    return await asyncio.to_thread(dataframe_to_table, result_df)
+
+
+def finish_extraction(key: tuple, task: asyncio.Task) -> None:
+    """
+    Done callback of a shared study variable extraction.
+
+    The result is cached here rather than by the waiting requests, so it is kept
+    even if every client timed out or disconnected, and a failure is logged even
+    if nobody was left to receive it.
+    """
+    inflight_extractions.pop(key, None)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(f"Study variable extraction failed: {error}")
+        return
+    result = task.result()
+    # Error tables are not cached so that a retry runs again
+    if "Error" not in result["headers"]:
+        response_cache[key] = result
+
+
+async def wait_for_client(request: Request, task: asyncio.Task, timeout: float):
+    """
+    Wait for a shared task on behalf of one client.
+
+    The wait ends early if the client disconnects or the timeout expires. The
+    task itself is never cancelled, since other requests may be waiting on it.
+    """
+
+    async def watch_disconnect():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        watcher.cancel()
+
+    if task in done:
+        return task.result()
+    if watcher in done:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    raise HTTPException(
+        status_code=504, detail="Timed out waiting for study variable extraction"
+    )
+
+
 @router.post("/study_variables", tags=["zotero"])
-def process_study_variables(
-    study_request: StudyVariableRequest, session_data: dict = Depends(get_session_data)
+async def process_study_variables(
+    request: Request,
+    study_request: StudyVariableRequest,
+    session_data: dict = Depends(get_session_data),
 ):
     """
     Process text and return study variable data based on specified parameters.
@@ -382,6 +679,8 @@ def process_study_variables(
     HTTPException
         401 Unauthorized - If session or Zotero library ID is missing
         500 Internal Server Error - If processing fails
+        504 Gateway Timeout - If the extraction takes longer than
+            STUDY_VARIABLES_TIMEOUT_SECONDS
 
     Example
     -------
@@ -407,6 +706,7 @@ def process_study_variables(
     -----
     - Requires a valid session (session_token cookie).
     - The study_variable must exist in the user's Zotero library.
+    - Results are cached for a few minutes per library, study, prompt type and text.
     """
     # Check for session and zotero_library_id
     if (
@@ -425,21 +725,37 @@ def process_study_variables(
     text = study_request.text
 
     try:
-        # Call your own service logic
-        result_df, _ = process_multi_input(text, study_variable, prompt_type, cache)
-
-        # Replace problematic values
-        result_df = result_df.replace([float("inf"), float("-inf")], None)
-        result_df = result_df.where(
-            pd.notnull(result_df), None
-        )  # replaces NaN with None
-
-        # Convert DataFrame to dict for JSON response
-        result = {
-            "headers": result_df.columns.tolist(),
-            "data": result_df.values.tolist(),
-        }
-        return {"result": result}
+        # Identical requests are served from the response cache instead of
+        # re-running the extraction
+        key = (
+            "study_variables",
+            session_data["zotero_library_id"],
+            study_variable,
+            prompt_type,
+            text,
+        )
+        result = response_cache.get(key)
+        if result is None:
+            task = inflight_extractions.get(key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    extract_study_variables(
+                        text, study_variable, prompt_type, session_data
+                    )
+                )
+                inflight_extractions[key] = task
+                task.add_done_callback(functools.partial(finish_extraction, key))
+            # Stop waiting on timeout or disconnect, but leave the shared task
+            # running for the other requests waiting on it
+            result = await wait_for_client(
+                request, task, STUDY_VARIABLES_TIMEOUT_SECONDS
+            )
+        return NumpyORJSONResponse(
+            {"result": result},
+            headers={"Cache-Control": f"private, max-age={int(response_cache.ttl)}"},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in process_study_variables: {e}")
         raise HTTPException(
@@ -448,7 +764,7 @@ def process_study_variables(
 
 
 @router.post("/new_study_choices", tags=["zotero"])
-def new_study_choices_endpoint(session_data: dict = Depends(get_session_data)):
+async def new_study_choices_endpoint(session_data: dict = Depends(get_session_data)):
     """
     Fetch a list of available study choices for the current session's Zotero library.
 
@@ -501,17 +817,21 @@ def new_study_choices_endpoint(session_data: dict = Depends(get_session_data)):
         )
 
     zotero_id = session_data["zotero_library_id"]
-    result = get_study_choices_service(zotero_id)
+    key = ("new_study_choices", zotero_id)
+    result = response_cache.get(key)
+    if result is None:
+        result = await asyncio.to_thread(get_study_choices_service, zotero_id)
+        response_cache[key] = result
     return {"result": result}
 
 
 @app.post("/download_csv", tags=["zotero"])
-def download_csv(payload: DownloadCSV):
+async def download_csv(payload: DownloadCSV, background_tasks: BackgroundTasks):
     """
-    Generate a CSV file from provided data and return the file path.
+    Export provided tabular data as a downloadable file.
 
-    This endpoint takes tabular data (headers and rows), saves it as a CSV file on the server,
-    and returns the file path. The client can then use this path to download the file via a separate endpoint.
+    This endpoint takes tabular data (headers and rows) and sends it back as a file
+    attachment in the requested format.
 
     Parameters
     ----------
@@ -520,12 +840,13 @@ def download_csv(payload: DownloadCSV):
         - headers (List[str]): List of column names
         - data (List[List[Any]]): 2D array of data rows
         - metadata (Optional[Any]): Optional metadata about the data
+        - format (str): Export format, one of "csv" (default), "parquet" or "feather"
 
     Returns
     -------
-    dict
-        A dictionary with:
-        - file_path: The path to the generated CSV file on the server
+    StreamingResponse or FileResponse
+        - csv: a StreamingResponse with the CSV rows
+        - parquet / feather: a FileResponse with the exported file
 
     Raises
     ------
@@ -546,42 +867,56 @@ def download_csv(payload: DownloadCSV):
         }
 
     Response:
-        {
-            "file_path": "zotero_data/study_export_20250503_220616.csv"
-        }
+        The file as an attachment, e.g. with the header
+        Content-Disposition: attachment; filename="study_export_20250503_220616.csv"
 
     Notes
     -----
-    - The client should use the returned file_path to download the file via a separate endpoint.
-    - The file will be deleted after download or after a certain period for cleanup.
+    - CSV exports are streamed in chunks of rows without being written to disk.
+    - Parquet and Feather exports are written to a temporary file, which is deleted
+      from the server once the response has been sent.
     """
     try:
-        # Convert payload to DataFrame
-        df = pd.DataFrame(payload.data, columns=payload.headers)
-        # Replace problematic values for CSV export
-        df = df.replace([float("inf"), float("-inf")], None)
-        df = df.where(pd.notnull(df), None)
-
-        # Use your own service to export DataFrame to CSV
-        file_path = download_as_csv(df)
-        if not file_path or not os.path.exists(file_path):
+        if payload.format == "csv":
+            # Stream CSV straight from the DataFrame instead of going via disk
+            df = await asyncio.to_thread(payload_to_dataframe, payload)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return StreamingResponse(
+                iter_csv(df),
+                media_type=EXPORT_MEDIA_TYPES["csv"],
+                headers={
+                    "Content-Disposition": f'attachment; filename="study_export_{timestamp}.csv"'
+                },
+            )
+
+        # Build and export the DataFrame in a worker thread
+        file_path = await asyncio.to_thread(export_payload, payload)
+        # Stat once and hand the result to FileResponse so it does not stat again
+        try:
+            stat_result = os.stat(file_path) if file_path else None
+        except FileNotFoundError:
+            stat_result = None
+        if stat_result is None:
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Clean up temp files after download
-        # cleanup_temp_files()
+        # Remove the exported file once the response has been sent
+        background_tasks.add_task(os.remove, file_path)
 
         return FileResponse(
             file_path,
-            media_type="text/csv",
+            media_type=EXPORT_MEDIA_TYPES[payload.format],
             filename=os.path.basename(file_path),
+            stat_result=stat_result,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in download_csv: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate CSV: {e}")
 
 
-def save_upload_file(upload_file: UploadFile) -> str:
-    """Save an uploaded file to disk with a timestamped filename.
+async def save_upload_file(upload_file: UploadFile) -> str:
+    """Save an uploaded file to disk under a unique filename.
 
     Parameters
     ----------
@@ -595,23 +930,68 @@ def save_upload_file(upload_file: UploadFile) -> str:
 
     Notes
     -----
-    - Creates UPLOAD_DIR if it doesn't exist
-    - Generates filename using timestamp to prevent collisions
-    - Filename format: YYYYMMDD_HHMMSS_original_filename
+    - Expects UPLOAD_DIR to exist; handle_pdf_uploads creates it once per request
+    - Filename format: <uuid4 hex>_original_filename, so concurrent uploads never
+      share a path; any directory part of the client's filename is dropped
+    - Copies the upload to disk in chunks on UPLOAD_IO_EXECUTOR, in a single hop off
+      the event loop rather than one per chunk read and write
     """
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{upload_file.filename}"
+    filename = f"{uuid4().hex}_{upload_filename(upload_file)}"
     file_path = os.path.join(UPLOAD_DIR, filename)
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+    await asyncio.get_running_loop().run_in_executor(
+        UPLOAD_IO_EXECUTOR, copy_upload, upload_file.file, file_path
+    )
 
     return file_path
 
 
+def finish_pdf_extraction(df: pd.DataFrame, csv_path: str) -> Dict[str, Any]:
+    """
+    Fill in missing values and summaries of an extracted DataFrame, export it as
+    gzipped CSV and return it formatted for the response.
+    """
+    df.fillna("Not Available", inplace=True)
+    df = update_summary_columns(df)
+    # Rendering the whole DataFrame would be slow; log its shape
+    logger.debug("Extracted %d rows x %d columns", *df.shape)
+    msg = export_dataframe_to_csv(df, csv_path, chunksize=50_000, compression="gzip")
+    logger.info(msg)
+    return format_dataframe(df, include_metadata=True)
+
+
+async def load_upload(upload_file: UploadFile) -> Union[PdfUpload, str]:
+    """Return a small upload as an in-memory PdfUpload, or save a large one to disk.
+
+    Parameters
+    ----------
+    upload_file : UploadFile
+        The FastAPI UploadFile object containing the file
+
+    Returns
+    -------
+    PdfUpload or str
+        The in-memory upload, or the full path where the file was saved
+    """
+    if upload_file.size is not None and upload_file.size <= UPLOAD_IN_MEMORY_MAX_SIZE:
+        return PdfUpload(upload_filename(upload_file), await upload_file.read())
+    return await save_upload_file(upload_file)
+
+
+def upload_filename(upload_file: UploadFile) -> str:
+    """Return the base name of an upload's filename, without any client-side path."""
+    return PurePosixPath((upload_file.filename or "").replace("\\", "/")).name
+
+
+def copy_upload(source, file_path: str) -> None:
+    """Copy an upload's spooled file object to file_path in UPLOAD_CHUNK_SIZE chunks."""
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, UPLOAD_CHUNK_SIZE)
+
+
 @app.post("/upload_and_process_pdf_files", tags=["zotero"])
-def handle_pdf_uploads(
+async def handle_pdf_uploads(
+    background_tasks: BackgroundTasks,
     study_name: str = Form(),
     study_variables: str = Form(),
     files: List[UploadFile] = File(...),
@@ -673,34 +1053,40 @@ def handle_pdf_uploads(
 
     Notes
     -----
-    - Saves uploaded PDFs with timestamped filenames
+    - Processes PDFs of up to 1 MiB from memory and saves larger ones under
+      unique filenames
     - Processes PDFs using stuff_summarise_document_bullets
-    - Saves results to CSV in zotero_data/<study_name>.csv
-    - Cleans up temporary files after processing
+    - Saves results to gzipped CSV in zotero_data/<study_name>.csv.gz
+    - Cleans up temporary files once the response has been sent
     """
-    uploaded_files = [save_upload_file(file) for file in files]
+    # cleanup_temp_files removes the upload directory, so recreate it once here
+    # rather than for every file
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    uploaded_files = await asyncio.gather(*(load_upload(file) for file in files))
 
     if uploaded_files:
-        df = process_multiple_pdfs(
-            uploaded_files, study_variables, stuff_summarise_document_bullets
+        df = await asyncio.to_thread(
+            process_multiple_pdfs,
+            uploaded_files,
+            study_variables,
+            stuff_summarise_document_bullets,
+        )
+        # Cleanup, export and formatting are all CPU-bound pandas work, so they
+        # run together off the event loop
+        response = await asyncio.to_thread(
+            finish_pdf_extraction, df, f"zotero_data/{study_name}.csv.gz"
         )
-        df.fillna("Not Available", inplace=True)
-        logger.info(df)
-
-        df = update_summary_columns(df)
-        logger.info(df)
-        msg = export_dataframe_to_csv(df, f"zotero_data/{study_name}.csv")
-        logger.info(msg)
     else:
         df = pd.DataFrame(
             {"Attachments": ["Documents have no pdf attachements to process"]}
         )
+        response = format_dataframe(df, include_metadata=True)
 
-    response = format_dataframe(df, include_metadata=True)
-
-    cleanup_temp_files()
+    # Run the cleanup after the response is sent rather than before it
+    background_tasks.add_task(cleanup_temp_files)
 
-    return {"data": response}
+    # Serialize straight to bytes with orjson, skipping the jsonable_encoder pass
+    return NumpyORJSONResponse({"data": response})
 
 
 @router.get("/mendeley_auth", tags=["mendeley"])
@@ -778,8 +1164,8 @@ def extract_metadata(access_token: str, pdf_file_path: str):
         metadata_file_path = service.extract_metadata(access_token, pdf_file_path)
         if metadata_file_path:
             # Load the metadata JSON data from the file
-            with open(metadata_file_path, "r") as metadata_file:
-                metadata_json = json.load(metadata_file)
+            with open(metadata_file_path, "rb") as metadata_file:
+                metadata_json = orjson.loads(metadata_file.read())
             return {
                 "metadata_file_path": metadata_file_path,
                 "metadata_json": metadata_json,
@@ -1,17 +1,14 @@
 # app.py
 import logging
 import os
-from typing import Any, List, Tuple, Union
+import threading
 
-import gradio as gr
 import openai
-import pandas as pd
-from cachetools import LRUCache
 from dotenv import load_dotenv
 
 from config import DATA_DIR, GRADIO_URL, OPENAI_API_KEY, logger
 from interface.gradio_ui import demo
-from utils.db import create_db_and_tables, get_study_files_by_library_id
+from utils.db import create_db_and_tables
 from utils.helpers import add_study_files_to_chromadb, create_directory
 
 create_directory(DATA_DIR)
@@ -24,52 +21,20 @@ environment = os.getenv("ENVIRONMENT", "development")
 
 openai.api_key = OPENAI_API_KEY
 
-# Initialize ChromaDB with study files
-add_study_files_to_chromadb("study_files.json", "study_files_collection")
-
-# Create sqlite study file data table
+# Initialize ChromaDB with study files in the background. Nothing in the app
+# queries the collection, so startup does not need to wait for it.
+threading.Thread(
+    target=add_study_files_to_chromadb,
+    args=("study_files.json", "study_files_collection"),
+    name="chromadb-init",
+    daemon=True,
+).start()
+
+# Create sqlite study file data table. Study lookups need it, and creating it is
+# a quick local operation, so it stays on the startup path.
 create_db_and_tables()
 
 
-# Cache for RAG pipelines
-rag_cache = {}
-
-cache = LRUCache(maxsize=100)
-
-
-def get_cache_value(key):
-    return cache.get(key)
-
-
-zotero_library_id = get_cache_value("zotero_library_id")
-logger.info(f"zotero_library_id cache: {zotero_library_id}")
-
-
-def refresh_study_choices():
-    """
-    Refresh study choices for a specific dropdown instance.
-
-    :return: Updated Dropdown with current study choices
-    """
-    global study_choices, zotero_library_id
-    zotero_library_id = get_cache_value("zotero_library_id")
-    logger.info(f"zotero_library_id refreshed: {zotero_library_id}")
-    study_choices = [
-        file.name for file in get_study_files_by_library_id([zotero_library_id])
-    ]
-    logger.info(f"Study choices refreshed: {study_choices}")
-    return study_choices
-
-
-def new_study_choices():
-    """
-    Refresh study choices for a specific dropdown instance.
-    """
-    study_choices = refresh_study_choices()
-    study_choices = ", ".join(study_choices)
-    return f"**Your studies are: {study_choices}**"
-
-
 if __name__ == "__main__":
     if environment == "development":
         logger.info("Running in development mode")
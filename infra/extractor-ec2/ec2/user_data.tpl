@@ -37,7 +37,7 @@ bash -c "source env/bin/activate && pip install -r requirements.txt"
 
 # Start streamlit (run in background)
 bash -c "cd /home/ubuntu/acres && source env/bin/activate && nohup gradio app.py > /var/log/gradio.log 2>&1 &"
-bash -c "cd /home/ubuntu/acres && source env/bin/activate && nohup uvicorn api:app --host 0.0.0.0 --port 8000 > /var/log/fastapi-uvicorn.log 2>&1 &"
+bash -c "cd /home/ubuntu/acres && source env/bin/activate && nohup uvicorn api:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools > /var/log/fastapi-uvicorn.log 2>&1 &"
 
 
 # Log completion
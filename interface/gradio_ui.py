@@ -1,10 +1,10 @@
 import os
+import threading
 
 import gradio as gr
-from cachetools import LRUCache
 from dotenv import load_dotenv
 
-from config import GRADIO_URL, STUDY_FILES, logger
+from config import STUDY_FILES, logger
 from services.file_service import (
     cleanup_temp_files,
     download_as_csv,
@@ -15,24 +15,36 @@ from services.file_service import (
 from services.rag_service import process_multi_input
 # Import service functions
 from services.zotero_service import get_study_info, process_zotero_library_items
+from utils.session_store import LockedLRUCache
 
 load_dotenv()
 
-# Create a cache instance for session state
-cache = LRUCache(maxsize=100)
+# Create a cache instance for session state, shared by the handler threads
+cache = LockedLRUCache(maxsize=100)
+
+# Events that call the LLM share one concurrency group ("llm") of this size
+LLM_CONCURRENCY_LIMIT = 4
 
 
 def get_cache_value(key):
     return cache.get(key)
 
 
-process_zotero_library_items(
-    os.getenv("ZOTERO_LIBRARY_ID"), os.getenv("ZOTERO_API_ACCESS_KEY"), cache
-)
+def load_default_zotero_library():
+    """Import the Zotero library configured in the environment into the cache."""
+    message = process_zotero_library_items(
+        os.getenv("ZOTERO_LIBRARY_ID"), os.getenv("ZOTERO_API_ACCESS_KEY"), cache
+    )
+    logger.info(message)
+    logger.info(f"zotero_library_id cache: {get_cache_value('zotero_library_id')}")
 
 
-zotero_library_id = get_cache_value("zotero_library_id")
-logger.info(f"zotero_library_id cache: {zotero_library_id}")
+# Import the default library in the background, so that importing this module
+# (and with it starting the app) does not wait on the Zotero API. Studies it
+# adds show up when the study list is refreshed.
+threading.Thread(
+    target=load_default_zotero_library, name="default-zotero-import", daemon=True
+).start()
 
 
 def create_gr_interface() -> gr.Blocks:
@@ -145,6 +157,8 @@ def create_gr_interface() -> gr.Blocks:
                     handle_pdf_upload,
                     inputs=[pdf_files, collection_name, upload_variables],
                     outputs=[pdf_status, current_collection],
+                    concurrency_limit=LLM_CONCURRENCY_LIMIT,
+                    concurrency_id="llm",
                 )
 
                 # Event handler for processing the PDF query.
@@ -152,6 +166,8 @@ def create_gr_interface() -> gr.Blocks:
                     process_pdf_query,
                     inputs=[pdf_variables, current_collection],
                     outputs=[pdf_answer_output, pdf_download_btn],
+                    concurrency_limit=LLM_CONCURRENCY_LIMIT,
+                    concurrency_id="llm",
                 )
 
                 # Download button handler.
@@ -172,13 +188,18 @@ def create_gr_interface() -> gr.Blocks:
         )
 
         study_dropdown.change(
-            get_study_info, inputs=[study_dropdown], outputs=[study_info]
+            get_study_info,
+            inputs=[study_dropdown],
+            outputs=[study_info],
+            concurrency_limit=None,
         )
 
         submit_btn.click(
             lambda vars, study, prompt: process_multi_input(vars, study, prompt, cache),
             inputs=[study_variables, study_dropdown, prompt_type],
             outputs=[answer_output, download_btn],
+            concurrency_limit=LLM_CONCURRENCY_LIMIT,
+            concurrency_id="llm",
         )
 
         download_btn.click(
@@ -187,12 +208,16 @@ def create_gr_interface() -> gr.Blocks:
 
         refresh_button.click(
             lambda zotero_id: new_study_choices(
-                zotero_id if zotero_id else zotero_library_id
+                zotero_id if zotero_id else get_cache_value("zotero_library_id")
             ),
             inputs=[zotero_library_id_param],
             outputs=[new_studies, study_dropdown],
         )
 
+    # Let independent events run side by side instead of Gradio's default of
+    # one at a time per event
+    demo.queue(default_concurrency_limit=10, max_size=64)
+
     return demo
 
 
@@ -1,11 +1,13 @@
 # rag/rag_pipeline.py
-import json
 import logging
 import os
 import re
+import threading
 from typing import Any, Dict, List, Optional, Tuple
 
 import chromadb
+import orjson
+from cachetools import LRUCache
 from dotenv import load_dotenv
 from llama_index.core import Document, PromptTemplate, VectorStoreIndex
 from llama_index.core.node_parser import SentenceSplitter, SentenceWindowNodeParser
@@ -18,6 +20,26 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Parsed study files keyed by (path, mtime_ns, size), so a file is parsed once
+# per version however many pipelines are built from it. Callers must not
+# modify the returned data.
+study_json_cache = LRUCache(maxsize=32)
+study_json_cache_lock = threading.Lock()
+
+
+def load_study_json(path: str) -> Any:
+    """Return the parsed contents of a study file, parsing it only if it changed."""
+    stat_result = os.stat(path)
+    key = (os.path.abspath(path), stat_result.st_mtime_ns, stat_result.st_size)
+    with study_json_cache_lock:
+        data = study_json_cache.get(key)
+    if data is None:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        with study_json_cache_lock:
+            study_json_cache[key] = data
+    return data
+
 
 class RAGPipeline:
     def __init__(
@@ -42,11 +64,10 @@ class RAGPipeline:
     def _check_if_pdf_collection(self) -> bool:
         """Check if this is a PDF collection based on the JSON structure."""
         try:
-            with open(self.study_json, "r") as f:
-                data = json.load(f)
-                # Check first document for PDF-specific fields
-                if data and isinstance(data, list) and len(data) > 0:
-                    return "pages" in data[0] and "source_file" in data[0]
+            data = load_study_json(self.study_json)
+            # Check first document for PDF-specific fields
+            if data and isinstance(data, list) and len(data) > 0:
+                return "pages" in data[0] and "source_file" in data[0]
             return False
         except Exception as e:
             logger.error(f"Error checking collection type: {str(e)}")
@@ -71,8 +92,7 @@ class RAGPipeline:
 
     def load_documents(self):
         if self.documents is None:
-            with open(self.study_json, "r") as f:
-                self.data = json.load(f)
+            self.data = load_study_json(self.study_json)
 
             self.documents = []
             if self.is_pdf:
@@ -183,7 +203,7 @@ class RAGPipeline:
         )
 
         n_documents = len(self.index.docstore.docs)
-        print(f"n_documents: {n_documents}")
+        logger.debug("n_documents: %d", n_documents)
         query_engine = self.index.as_query_engine(
             text_qa_template=prompt_template,
             similarity_top_k=n_documents if n_documents <= 17 else 15,
@@ -193,10 +213,11 @@ class RAGPipeline:
 
         response = query_engine.query(context)
 
+        source_nodes = getattr(response, "source_nodes", [])
         # Debug logging
-        print(f"Response type: {type(response)}")
-        print(f"Has source_nodes: {hasattr(response, 'source_nodes')}")
-        if hasattr(response, "source_nodes"):
-            print(f"Number of source nodes: {len(response.source_nodes)}")
-
-        return response.response, getattr(response, "source_nodes", [])
+        logger.debug(
+            "Response type: %s, number of source nodes: %d",
+            type(response).__name__,
+            len(source_nodes),
+        )
+        return response.response, source_nodes
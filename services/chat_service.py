@@ -1,6 +1,8 @@
+import threading
 import time
 
 import pandas as pd
+from cachetools import TTLCache
 
 from config import logger
 from utils.zotero_manager import ZoteroManager
@@ -14,6 +16,13 @@ from utils.zotero_pdf_processory import (
     update_summary_columns,
 )
 
+# Extraction results per library, study and variable set, so that repeating a
+# query skips downloading and summarising the study's PDFs again. Entries expire
+# so that PDFs added to the Zotero collection are picked up.
+CHAT_RESULT_TTL_SECONDS = 300
+chat_result_cache = TTLCache(maxsize=64, ttl=CHAT_RESULT_TTL_SECONDS)
+chat_result_cache_lock = threading.Lock()
+
 
 def chat_function(
     message: str, study_name: str, prompt_type: str, variable_list: list, cache=None
@@ -47,6 +56,21 @@ def chat_function(
             }
         )
 
+    key = (
+        zotero_library_id,
+        study_name,
+        tuple(sorted(variable.strip().upper() for variable in variable_list)),
+    )
+    with chat_result_cache_lock:
+        cached_df = chat_result_cache.get(key)
+    if cached_df is not None:
+        logger.info(f"Reusing extracted data for {study_name}.")
+        # The export may have been removed by the temp file cleanup since
+        msg = export_dataframe_to_csv(cached_df, f"zotero_data/{study_name}.csv")
+        logger.info(msg)
+        # Callers may modify the frame, so never hand out the cached one
+        return cached_df.copy()
+
     logger.info(f"Starting process processing of {study_name}.")
 
     try:
@@ -79,6 +103,9 @@ def chat_function(
         )
 
         df = update_summary_columns(df)
+        if not df.empty:
+            with chat_result_cache_lock:
+                chat_result_cache[key] = df.copy()
 
         # Export results
         msg = export_dataframe_to_csv(df, f"zotero_data/{study_name}.csv")
@@ -1,22 +1,23 @@
-import csv
 import datetime
-import io
-import json
 import os
+import re
 import shutil
 import time
+from uuid import uuid4
 
-import gradio as gr
+import orjson
 import pandas as pd
 from slugify import slugify
 
-from config import DATA_DIR, UPLOAD_DIR, logger
-from utils.db import (
-    add_study_files_to_db,
-    get_study_file_by_name,
-    get_study_files_by_library_id,
+from config import DATA_DIR, logger
+from utils.db import add_study_files_to_db
+from utils.helpers import (
+    add_study_files_data_to_chromadb,
+    append_to_study_files,
+    get_study_file_path,
+    get_study_names,
+    invalidate_study_names,
 )
-from utils.helpers import add_study_files_to_chromadb, append_to_study_files
 from utils.pdf_processor import PDFProcessor
 from utils.zotero_pdf_processory import (
     export_dataframe_to_csv,
@@ -25,6 +26,33 @@ from utils.zotero_pdf_processory import (
     update_summary_columns,
 )
 
+# A markdown table row, with or without the closing pipe, and the cells of its
+# header separator row
+MARKDOWN_ROW_RE = re.compile(r"^[ \t]*\|(.*?)\|?[ \t\r]*$", re.MULTILINE)
+MARKDOWN_SEPARATOR_RE = re.compile(r":?-{3,}:?")
+# A cell boundary inside a row, together with the padding around it
+MARKDOWN_CELL_BOUNDARY_RE = re.compile(r"\s*\|\s*")
+
+# Downloads and exports; cleanup_temp_files deletes the whole directory, so
+# nothing that must persist may live in it
+TEMP_DATA_DIR = "zotero_data"
+
+
+def export_dataframe_to_json(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Write a DataFrame to a JSON file as a list of row records.
+
+    pandas serialises the columns directly, instead of building a dict per row
+    and encoding those in Python.
+    """
+    df.to_json(
+        file_path,
+        orient="records",
+        indent=2,
+        force_ascii=False,
+        double_precision=15,
+    )
+
 
 def handle_pdf_upload(files, name, variables=""):
     """
@@ -61,8 +89,8 @@ def handle_pdf_upload(files, name, variables=""):
 
         os.makedirs(DATA_DIR, exist_ok=True)
         metadata_path = f"{DATA_DIR}/{collection_id}_metadata.json"
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2)
+        with open(metadata_path, "wb") as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
 
         # Process PDFs with variables if provided
         if variables:
@@ -83,16 +111,18 @@ def handle_pdf_upload(files, name, variables=""):
 
             # Export the dataframe to JSON
             json_output_path = f"{DATA_DIR}/{collection_id}_data.json"
-            with open(json_output_path, "w", encoding="utf-8") as f:
-                json.dump(df.to_dict(orient="records"), f, indent=2, ensure_ascii=False)
+            export_dataframe_to_json(df, json_output_path)
         else:
             # If no variables specified, just create empty placeholder files
             json_output_path = metadata_path
 
         # Add to study files and ChromaDB
-        append_to_study_files("study_files.json", collection_id, json_output_path)
-        add_study_files_to_chromadb("study_files.json", "study_files_collection")
+        all_study_files = append_to_study_files(
+            "study_files.json", collection_id, json_output_path
+        )
+        add_study_files_data_to_chromadb(all_study_files, "study_files_collection")
         add_study_files_to_db("study_files.json", "local")
+        invalidate_study_names()
 
         return (
             f"Successfully processed PDFs into collection: {collection_id}",
@@ -114,6 +144,8 @@ def process_pdf_query(variable_text: str, collection_id: str):
     Returns:
         Tuple[pd.DataFrame, gr.update]: Query results and download button update
     """
+    import gradio as gr
+
     logger.info(f"Collection ID: {collection_id}")
     if not collection_id:
         return (
@@ -124,22 +156,17 @@ def process_pdf_query(variable_text: str, collection_id: str):
         )
 
     # Find the study file by collection_id
-    study = get_study_file_by_name(collection_id)
-    logger.info(f"Study: {study}")
-    if not study:
+    study_file = get_study_file_path(collection_id)
+    logger.info(f"Study file: {study_file}")
+    if not study_file:
         return pd.DataFrame(
             {"Error": [f"Study for Collection '{collection_id}' not found."]}
         ), gr.update(visible=False)
 
-    study_file_path = None
-    # Try to find the data or metadata file
-    for ext in ["_data.json", "_metadata.json"]:
-        candidate = os.path.join(DATA_DIR, f"{collection_id}{ext}")
-        if os.path.exists(candidate):
-            study_file_path = candidate
-            break
-
-    if not study_file_path:
+    # The original PDF paths and variables are in the small metadata file; the
+    # extracted data file can be large and is not needed to reprocess the PDFs
+    metadata_path = os.path.join(DATA_DIR, f"{collection_id}_metadata.json")
+    if not os.path.exists(metadata_path):
         return (
             pd.DataFrame({"Error": [f"Collection '{collection_id}' not found."]}),
             gr.update(visible=False),
@@ -147,10 +174,8 @@ def process_pdf_query(variable_text: str, collection_id: str):
 
     try:
         start_time = time.time()
-        # If this is a metadata file or no variables, reprocess PDFs
-        is_metadata = study_file_path.endswith("_metadata.json")
-        with open(study_file_path, "r") as f:
-            metadata = json.load(f)
+        with open(metadata_path, "rb") as f:
+            metadata = orjson.loads(f.read())
 
         file_paths = metadata.get("file_paths", [])
         if not file_paths:
@@ -183,9 +208,8 @@ def process_pdf_query(variable_text: str, collection_id: str):
         export_dataframe_to_csv(df, csv_output_path)
 
         # Update the data file
-        data_path = study_file_path.replace("_metadata.json", "_data.json")
-        with open(data_path, "w", encoding="utf-8") as f:
-            json.dump(df.to_dict(orient="records"), f, indent=2, ensure_ascii=False)
+        data_path = os.path.join(DATA_DIR, f"{collection_id}_data.json")
+        export_dataframe_to_json(df, data_path)
 
         end_time = time.time()
 
@@ -194,7 +218,8 @@ def process_pdf_query(variable_text: str, collection_id: str):
         seconds = int(elapsed_time % 60)
 
         logger.info(
-            f"Elapsed time to process {study.name} {len(file_paths)} pdf documents: {minutes} minutes and {seconds} seconds"
+            f"Elapsed time to process {collection_id} {len(file_paths)} pdf documents: "
+            f"{minutes} minutes and {seconds} seconds"
         )
 
         return df, gr.update(visible=True)
@@ -213,7 +238,21 @@ def download_as_csv(df):
     Returns:
         str: Path to the generated CSV file.
     """
-    logger.info("Downloading as CSV")
+    return download_as_file(df, "csv")
+
+
+def download_as_file(df, file_format="csv"):
+    """
+    Export a DataFrame to a file in the given format and provide the file path for download.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to export.
+        file_format (str): One of "csv", "parquet" or "feather". Default is "csv".
+
+    Returns:
+        str: Path to the generated file.
+    """
+    logger.info(f"Downloading as {file_format}")
     import datetime
 
     # Ensure the input is a DataFrame
@@ -226,15 +265,22 @@ def download_as_csv(df):
 
     # Create a unique temporary file path
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_path = os.path.join("zotero_data", f"study_export_{timestamp}.csv")
+    temp_path = os.path.join(
+        "zotero_data", f"study_export_{timestamp}_{uuid4().hex[:8]}.{file_format}"
+    )
 
     try:
-        # Export DataFrame to CSV
-        df.to_csv(temp_path, index=False)
-        logger.info(f"CSV exported to {temp_path}")
+        # Export DataFrame in the requested format
+        if file_format == "parquet":
+            df.to_parquet(temp_path, engine="pyarrow", compression="zstd", index=False)
+        elif file_format == "feather":
+            df.reset_index(drop=True).to_feather(temp_path)
+        else:
+            df.to_csv(temp_path, index=False)
+        logger.info(f"{file_format} exported to {temp_path}")
         return temp_path
     except Exception as e:
-        logger.error(f"Error exporting DataFrame to CSV: {e}")
+        logger.error(f"Error exporting DataFrame to {file_format}: {e}")
         return None
 
 
@@ -255,15 +301,10 @@ def delete_files_in_directory(directory_path):
         return f"'{directory_path}' is not a directory."
 
     try:
-        # List all files and directories in the specified directory
-        for item in os.listdir(directory_path):
-            item_path = os.path.join(directory_path, item)
-            # Check if it's a file and delete it
-            if os.path.isfile(item_path):
-                os.remove(item_path)
-            # Check if it's a directory and delete it recursively
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
+        # Removing the whole tree and recreating the empty directory is cheaper
+        # than deleting its entries one by one
+        shutil.rmtree(directory_path)
+        os.makedirs(directory_path, exist_ok=True)
         return f"All files and directories in '{directory_path}' have been deleted."
     except Exception as e:
         return f"An error occurred while deleting files: {e}"
@@ -275,32 +316,9 @@ def cleanup_temp_files():
     """
     logger.info("Cleaning up temp files")
     try:
-        current_time = datetime.datetime.now()
-        for file in os.listdir():
-            if file.startswith("study_export_") and file.endswith(".csv"):
-                file_time = datetime.datetime.fromtimestamp(os.path.getmtime(file))
-                # Calculate the time difference in seconds
-                time_difference = (current_time - file_time).total_seconds()
-                if time_difference > 20:  # 5 minutes in seconds
-                    try:
-                        os.remove(file)
-                    except Exception as e:
-                        logger.warning(f"Failed to remove temp file {file}: {e}")
-
-        # Clean up uploaded files in UPLOAD_DIR
-        if os.path.exists(UPLOAD_DIR):
-            for file in os.listdir(UPLOAD_DIR):
-                file_path = os.path.join(UPLOAD_DIR, file)
-                try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                        logger.info(f"Removed upload file: {file}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove upload file {file}: {e}")
-
-        # Clean up downloaded files in zotero_data
-        zotero_data_dir = "zotero_data"
-        delete_files_in_directory(zotero_data_dir)
+        # Exports and uploads (UPLOAD_DIR) all live in zotero_data, so clearing
+        # it removes every temporary file
+        delete_files_in_directory(TEMP_DATA_DIR)
 
         return "Temporary files cleaned up."
     except Exception as e:
@@ -312,15 +330,12 @@ def new_study_choices(zotero_library_id=None):
     """
     Refresh and return the list of available study choices as a Markdown string, a list, and a value.
     """
+    import gradio as gr
+
     logger.info("Refreshing study choices")
     logger.info(f"Zotero ID: {zotero_library_id}")
     try:
-        if zotero_library_id:
-            study_files = get_study_files_by_library_id([zotero_library_id])
-        else:
-            study_files = get_study_files_by_library_id([])
-
-        study_choices = [file.name for file in study_files]
+        study_choices = get_study_names(zotero_library_id)
         # Markdown string
         if study_choices:
             md = f"**Your studies are:**<br>{'<br>'.join(study_choices)}"
@@ -334,6 +349,13 @@ def new_study_choices(zotero_library_id=None):
         return "Error refreshing study choices.", gr.update(choices=[], value=None)
 
 
+def csv_escape(cell: str) -> str:
+    """Quote a CSV cell only when it contains a delimiter, quote or line break."""
+    if any(char in cell for char in ',"\r\n'):
+        return '"' + cell.replace('"', '""') + '"'
+    return cell
+
+
 def markdown_table_to_csv(markdown_text: str) -> str:
     """
     Convert a markdown table to CSV format.
@@ -344,21 +366,18 @@ def markdown_table_to_csv(markdown_text: str) -> str:
     Returns:
         str: CSV formatted string
     """
-    lines = [line.strip() for line in markdown_text.split("\n") if line.strip()]
-    table_lines = [line for line in lines if line.startswith("|")]
-
-    if not table_lines:
+    # Most answers contain no table at all; skip the regex scan for them
+    if "|" not in markdown_text:
         return ""
 
-    csv_data = []
-    for line in table_lines:
-        if "---" in line:
+    rows = []
+    for match in MARKDOWN_ROW_RE.finditer(markdown_text):
+        cells = MARKDOWN_CELL_BOUNDARY_RE.split(match.group(1).strip())
+        # Skip the header separator row, e.g. |---|:---:|
+        if all(MARKDOWN_SEPARATOR_RE.fullmatch(cell) for cell in cells):
             continue
-        # Split by |, remove empty strings, and strip whitespace
-        cells = [cell.strip() for cell in line.split("|") if cell.strip()]
-        csv_data.append(cells)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerows(csv_data)
-    return output.getvalue()
+        rows.append(",".join(csv_escape(cell) for cell in cells))
+
+    if not rows:
+        return ""
+    return "\r\n".join(rows) + "\r\n"
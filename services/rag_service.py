@@ -1,29 +1,48 @@
-import gradio as gr
+import threading
+from typing import Dict, MutableMapping, Optional
+
 import pandas as pd
 
 from config import logger
 from rag.rag_pipeline import RAGPipeline
-from utils.db import get_study_file_by_name
+from utils.helpers import get_study_file_path
+from utils.variables import parse_variables
 
 from .chat_service import chat_function
 
+# RAG pipelines per study. Every pipeline adds its nodes to the process-wide
+# in-memory Chroma collection, so evicting a pipeline would free no vector
+# memory and rebuilding it would insert its nodes again; the cache is unbounded.
+rag_pipelines: Dict[str, RAGPipeline] = {}
 
-def get_rag_pipeline(study_name: str, rag_cache: dict) -> RAGPipeline:
-    """Get or create a RAGPipeline instance for the given study by querying ChromaDB."""
-    if study_name not in rag_cache:
-        study = get_study_file_by_name(study_name)
+# Guards the RAG pipeline cache, which is shared by handler threads, and
+# stops two threads from building the same pipeline twice
+rag_cache_lock = threading.Lock()
 
-        if not study:
-            raise ValueError(f"Invalid study name: {study_name}")
 
-        study_file = study.file_path
-        logger.info(f"study_file: {study_file}")
-        if not study_file:
-            raise ValueError(f"File path not found for study name: {study_name}")
+def get_rag_pipeline(
+    study_name: str, rag_cache: Optional[MutableMapping[str, RAGPipeline]] = None
+) -> RAGPipeline:
+    """
+    Get or create a RAGPipeline instance for the given study by querying ChromaDB.
 
-        rag_cache[study_name] = RAGPipeline(study_file)
+    Pipelines are kept in the module's rag_pipelines dict unless another cache
+    is given.
+    """
+    if rag_cache is None:
+        rag_cache = rag_pipelines
+    with rag_cache_lock:
+        rag_pipeline = rag_cache.get(study_name)
+        if rag_pipeline is None:
+            study_file = get_study_file_path(study_name)
+            logger.info(f"study_file: {study_file}")
+            if not study_file:
+                raise ValueError(f"Invalid study name: {study_name}")
 
-    return rag_cache[study_name]
+            rag_pipeline = RAGPipeline(study_file)
+            rag_cache[study_name] = rag_pipeline
+
+    return rag_pipeline
 
 
 def process_multi_input(variables: str, study_name: str, prompt_type: str, cache=None):
@@ -39,13 +58,15 @@ def process_multi_input(variables: str, study_name: str, prompt_type: str, cache
     Returns:
         Tuple[pd.DataFrame, gr.update]: Results and Gradio update object
     """
+    import gradio as gr
+
     logger.info(
         f"Processing multi input: variables={variables}, study={study_name}, prompt={prompt_type}"
     )
 
     try:
         # Split variables into a list
-        variable_list = [v.strip().upper() for v in variables.split(",")]
+        variable_list = parse_variables(variables)
         user_message = f"Extract and present in a tabular format the following variables for each {study_name} study: {', '.join(variable_list)}"
 
         try:
@@ -1,23 +1,96 @@
-import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, Queue
+from uuid import uuid4
 
+import orjson
 from cachetools import LRUCache
 from slugify import slugify
 
 from config import STUDY_FILES, logger
-from utils.db import (
-    add_study_files_to_db,
-    get_study_file_by_name,
-    get_study_files_by_library_id,
+from utils.db import add_study_files_to_db
+from utils.helpers import (
+    add_study_files_data_to_chromadb,
+    get_study_file_path,
+    invalidate_study_names,
+    update_study_files,
 )
-from utils.helpers import add_study_files_to_chromadb, append_to_study_files
 from utils.zotero_manager import ZoteroManager
 
+# Collections fetched from the Zotero API at the same time
+ZOTERO_FETCH_WORKERS = 8
+
+# Document counts of study files keyed by (path, mtime_ns, size), so a file is
+# only parsed again after it changes
+study_document_counts = LRUCache(maxsize=256)
+study_document_counts_lock = threading.Lock()
+
+# Serialises updates to study_files.json and the in-memory STUDY_FILES, which
+# are shared by every request processing a Zotero library
+study_files_lock = threading.Lock()
+
+
+@contextmanager
+def borrow_zotero_manager(
+    pool: Queue, library_id: str, library_type: str, api_key: str
+):
+    """
+    Borrow a ZoteroManager from the pool, creating one if none is free.
+
+    pyzotero keeps per-request state on the client, so a manager is used by one
+    thread at a time, but it is returned to the pool afterwards so its HTTP
+    connection is kept alive for the next collection.
+    """
+    try:
+        zotero_manager = pool.get_nowait()
+    except Empty:
+        zotero_manager = ZoteroManager(library_id, library_type, api_key)
+    try:
+        yield zotero_manager
+    finally:
+        pool.put(zotero_manager)
+
+
+def export_collection_items(
+    pool: Queue,
+    library_id: str,
+    library_type: str,
+    api_key: str,
+    collection_key: str,
+    export_path: str,
+):
+    """
+    Fetch the journal articles of one collection with a pooled ZoteroManager and
+    write them as JSON next to export_path.
+
+    The items are written to a uniquely named temporary file, whose path is
+    returned, so that the caller decides under the study files lock whether it
+    replaces export_path. Returns None if the collection could not be exported,
+    so that one failing collection does not abort the others exported alongside it.
+    """
+    try:
+        with borrow_zotero_manager(
+            pool, library_id, library_type, api_key
+        ) as zotero_manager:
+            zotero_collection_items = zotero_manager.get_collection_zotero_items_by_key(
+                collection_key
+            )
+            zotero_items_json = zotero_manager.zotero_items_to_json(
+                zotero_collection_items
+            )
+            tmp_path = f"{export_path}.{uuid4().hex}.tmp"
+            zotero_manager.write_zotero_items_to_json_file(zotero_items_json, tmp_path)
+            return tmp_path
+    except Exception as e:
+        logger.warning(f"Failed to export Zotero collection {collection_key}: {e}")
+        return None
+
 
 def process_zotero_library_items(
     zotero_library_id_param: str, zotero_api_access_key: str, cache: LRUCache
 ) -> str:
-    global zotero_library_id
     if not zotero_library_id_param or not zotero_api_access_key:
         return "Please enter your zotero library Id and API Access Key"
 
@@ -44,47 +117,70 @@ def process_zotero_library_items(
             )
         )
 
-        study_files_data = {}  # Dictionary to collect items for ChromaDB
+        # Dictionary to collect items for study_files.json and ChromaDB
+        study_files_data = {}
 
+        # Collections not exported yet; of several with the same name, the first wins
+        new_collections = {}
         for collection in filtered_zotero_collection_lists:
             collection_name = collection.get("name")
             if collection_name not in STUDY_FILES:
-                collection_key = collection.get("key")
-                collection_items = zotero_manager.get_collection_items(collection_key)
-                zotero_collection_items = (
-                    zotero_manager.get_collection_zotero_items_by_key(collection_key)
-                )
-                # Export zotero collection items to json
-                zotero_items_json = zotero_manager.zotero_items_to_json(
-                    zotero_collection_items
-                )
+                new_collections.setdefault(collection_name, collection)
+
+        # Fetch and write the collections concurrently; the API calls are pure
+        # network wait. At most one manager per worker is created and reused
+        # across collections.
+        zotero_manager_pool = Queue()
+        failed_collections = []
+        with ThreadPoolExecutor(max_workers=ZOTERO_FETCH_WORKERS) as executor:
+            exported_files = executor.map(
+                lambda item: export_collection_items(
+                    zotero_manager_pool,
+                    zotero_library_id,
+                    zotero_library_type,
+                    zotero_api_access_key,
+                    item[1].get("key"),
+                    f"data/{slugify(item[0])}_zotero_items.json",
+                ),
+                new_collections.items(),
+            )
+
+            for collection_name, tmp_path in zip(new_collections, exported_files):
+                if tmp_path is None:
+                    failed_collections.append(collection_name)
+                    continue
                 export_file = f"{slugify(collection_name)}_zotero_items.json"
-                zotero_manager.write_zotero_items_to_json_file(
-                    zotero_items_json, f"data/{export_file}"
-                )
-                logger.info(f"Adding {collection_name} - {export_file} to study files")
-                append_to_study_files(
-                    "study_files.json", collection_name, f"data/{export_file}"
-                )
-
-                # Collect for ChromaDB
+                with study_files_lock:
+                    if collection_name in STUDY_FILES:
+                        # Another request exported this collection meanwhile
+                        os.remove(tmp_path)
+                        continue
+                    os.replace(tmp_path, f"data/{export_file}")
+                    logger.info(
+                        f"Adding {collection_name} - {export_file} to study files"
+                    )
+
+                    # Update in-memory STUDY_FILES for reference in current session
+                    STUDY_FILES.update({collection_name: f"data/{export_file}"})
+                    logger.info(f"STUDY_FILES: {STUDY_FILES}")
+
+                # Collect for study_files.json and ChromaDB
                 study_files_data[collection_name] = f"data/{export_file}"
 
-                # Update in-memory STUDY_FILES for reference in current session
-                STUDY_FILES.update({collection_name: f"data/{export_file}"})
-                logger.info(f"STUDY_FILES: {STUDY_FILES}")
-
-        # After loop, add all collected data to ChromaDB
-        add_study_files_to_chromadb("study_files.json", "study_files_collection")
+        # After loop, write study_files.json once and add its data to ChromaDB
+        # without reading the file back
+        all_study_files = update_study_files("study_files.json", study_files_data)
+        add_study_files_data_to_chromadb(all_study_files, "study_files_collection")
         # Add collected data to sqlite
         add_study_files_to_db("study_files.json", zotero_library_id)
+        invalidate_study_names()
 
-        # Dynamically update study choices
-        global study_choices
-        study_choices = [
-            file.name for file in get_study_files_by_library_id([zotero_library_id])
-        ]
         message = "Successfully processed items in your zotero library"
+        if failed_collections:
+            message += (
+                f", except collections that failed to load: "
+                f"{', '.join(failed_collections)}"
+            )
     except Exception as e:
         message = f"Error process your zotero library: {str(e)}"
 
@@ -97,27 +193,29 @@ def get_study_info(study_name):
     Returns a string summary (can be adapted to return a dict for more structure).
     """
     logger.info(f"Getting info for study: {study_name}")
-    study = get_study_file_by_name(study_name)
-    if not study:
+    study_file = get_study_file_path(study_name)
+    if not study_file:
         return "No study selected"
 
-    study_file = study.file_path
-    if not study_file or not os.path.exists(study_file):
+    if not os.path.exists(study_file):
         return f"Study file for '{study_name}' not found."
 
     try:
-        with open(study_file, "r") as f:
-            data = json.load(f)
-        # If the file is a list of documents
-        if isinstance(data, list):
-            num_docs = len(data)
-            return f"### Number of documents: {num_docs}"
-        # If the file is a dict with a 'documents' key
-        elif isinstance(data, dict):
+        stat_result = os.stat(study_file)
+        key = (study_file, stat_result.st_mtime_ns, stat_result.st_size)
+        with study_document_counts_lock:
+            num_docs = study_document_counts.get(key)
+        if num_docs is None:
+            # Parsed locally so that only the count is kept, not the payload
+            with open(study_file, "rb") as f:
+                data = orjson.loads(f.read())
+            # The file is either a list of documents or a dict keyed by document
+            if not isinstance(data, (list, dict)):
+                return f"Study '{study_name}' loaded, but format is unrecognized."
             num_docs = len(data)
-            return f"### Number of documents: {num_docs}"
-        else:
-            return f"Study '{study_name}' loaded, but format is unrecognized."
+            with study_document_counts_lock:
+                study_document_counts[key] = num_docs
+        return f"### Number of documents: {num_docs}"
     except Exception as e:
         logger.error(f"Error reading study file: {e}")
         return f"Error reading study file for '{study_name}': {e}"
@@ -0,0 +1,15 @@
+from services.file_service import markdown_table_to_csv
+
+
+def test_markdown_table_to_csv_with_closing_pipes():
+    markdown = "| a | b |\n|---|---|\n| 1 | 2 |\n"
+    assert markdown_table_to_csv(markdown) == "a,b\r\n1,2\r\n"
+
+
+def test_markdown_table_to_csv_without_closing_pipes():
+    markdown = "| a | b\n|---|---\n| 1 | 2\n"
+    assert markdown_table_to_csv(markdown) == "a,b\r\n1,2\r\n"
+
+
+def test_markdown_table_to_csv_without_table():
+    assert markdown_table_to_csv("No table here.") == ""
@@ -1,14 +1,20 @@
 # utils/helpers.py
 
+import fcntl
 import json
 import os
-from typing import Any, Dict, List
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
 
 import chromadb
+import orjson
+from cachetools import LRUCache, TTLCache
 from chromadb.api.types import Document
 from llama_index.core import Response
 
 from rag.rag_pipeline import RAGPipeline
+from utils.db import get_study_file_by_name, get_study_files_by_library_id
 from utils.prompts import (
     StudyCharacteristics,
     VaccineCoverageVariables,
@@ -18,6 +24,23 @@ from utils.prompts import (
 # Initialize ChromaDB client
 chromadb_client = chromadb.Client()
 
+# Serialises read-modify-write updates of the study files JSON across threads
+study_files_json_lock = threading.Lock()
+
+# Study file paths keyed by (study name, study_files.json mtime). The database is
+# populated from that file, so a new mtime means the studies may have changed.
+study_file_paths = LRUCache(maxsize=128)
+study_file_paths_lock = threading.Lock()
+
+# Study names per Zotero library. invalidate_study_names bumps the generation
+# once new studies are in the database, so a lookup that raced with the write
+# cannot cache its stale result under the new generation. Other workers only see
+# new studies once their entries expire.
+STUDY_NAMES_TTL_SECONDS = 300
+study_names = TTLCache(maxsize=64, ttl=STUDY_NAMES_TTL_SECONDS)
+study_names_generation = 0
+study_names_lock = threading.Lock()
+
 
 def read_study_files(file_path):
     """
@@ -49,8 +72,8 @@ def read_study_files(file_path):
         }
     """
     try:
-        with open(file_path, "r") as file:
-            data = json.load(file)
+        with open(file_path, "rb") as file:
+            data = orjson.loads(file.read())
         return data
     except FileNotFoundError as e:
         raise FileNotFoundError(f"The file at path {file_path} was not found.") from e
@@ -60,6 +83,63 @@ def read_study_files(file_path):
         ) from e
 
 
+def get_study_file_path(study_name: str) -> Optional[str]:
+    """
+    Returns the file path of a study, or None if the study is not in the database.
+
+    Found paths are cached until study_files.json changes, so repeated lookups of a
+    study skip the database query. Studies that were not found are looked up again
+    each time, as they may be added to the database after the file is written.
+    """
+    key = (study_name, study_files_version())
+    with study_file_paths_lock:
+        file_path = study_file_paths.get(key)
+    if file_path is None:
+        study = get_study_file_by_name(study_name)
+        file_path = study.file_path if study else None
+        if file_path:
+            with study_file_paths_lock:
+                study_file_paths[key] = file_path
+    return file_path
+
+
+def study_files_version() -> Optional[int]:
+    """Returns the mtime of study_files.json, or None if it cannot be read."""
+    try:
+        return os.stat("study_files.json").st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_study_names(zotero_library_id: Optional[str] = None) -> List[str]:
+    """
+    Returns the names of the studies of a Zotero library, or of all libraries if
+    no library ID is given.
+
+    The names are cached for STUDY_NAMES_TTL_SECONDS, or in this process until
+    invalidate_study_names is called.
+    """
+    with study_names_lock:
+        key = (zotero_library_id, study_names_generation)
+        names = study_names.get(key)
+    if names is None:
+        library_ids = [zotero_library_id] if zotero_library_id else []
+        names = [file.name for file in get_study_files_by_library_id(library_ids)]
+        with study_names_lock:
+            # Skip caching if studies were added to the database meanwhile
+            if key[1] == study_names_generation:
+                study_names[key] = names
+    return list(names)
+
+
+def invalidate_study_names():
+    """Forgets the cached study names, after studies were added to the database."""
+    global study_names_generation
+    with study_names_lock:
+        study_names_generation += 1
+        study_names.clear()
+
+
 def append_to_study_files(file_path, new_key, new_value):
     """
     Appends a new key-value entry to an existing JSON file.
@@ -88,18 +168,55 @@ def append_to_study_files(file_path, new_key, new_value):
             "Ebola Virus": "data/ebola_virus_zotero_items.json",
             "Gene Xpert": "data/gene_xpert_zotero_items.json"
         }
+
+    Returns:
+        dict: The full contents of the file after the update.
     """
-    try:
-        # Read the existing data from the file
-        with open(file_path, "r") as file:
-            data = json.load(file)
+    return update_study_files(file_path, {new_key: new_value})
+
 
-        # Append the new key-value pair to the dictionary
-        data[new_key] = new_value
+def update_study_files(file_path, new_entries):
+    """
+    Adds several key-value entries to an existing JSON file in a single read and write.
 
-        # Write the updated data back to the file
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)  # indent for pretty printing
+    Args:
+        file_path (str): The path to the JSON file.
+        new_entries (dict): The entries to add, overwriting existing keys.
+
+    Returns:
+        dict: The full contents of the file after the update.
+
+    Raises:
+        FileNotFoundError: If the file is not found at the provided path.
+        ValueError: If the file contents are not valid JSON.
+        IOError: If the file cannot be written.
+    """
+    try:
+        # The lock file serialises updates across worker processes, the thread
+        # lock across threads of this one
+        with study_files_json_lock, open(f"{file_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with open(file_path, "rb") as file:
+                data = orjson.loads(file.read())
+            if not new_entries:
+                return data
+            data.update(new_entries)
+
+            # Write the merged data to a uniquely named sibling file and swap it
+            # in, so readers never see a partially written file. orjson only
+            # indents by two spaces, so json keeps the file's existing layout.
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump(data, file, indent=4)
+                os.chmod(tmp_path, os.stat(file_path).st_mode & 0o777)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return data
 
     except FileNotFoundError as e:
         raise FileNotFoundError(f"The file at path {file_path} was not found.") from e
@@ -190,12 +307,24 @@ def add_study_files_to_chromadb(file_path: str, collection_name: str):
     """
     # Load study files data from JSON file
     try:
-        with open(file_path, "r") as f:
-            study_files_data = json.load(f)
+        with open(file_path, "rb") as f:
+            study_files_data = orjson.loads(f.read())
     except FileNotFoundError:
         print(f"File '{file_path}' not found.")
         return
 
+    add_study_files_data_to_chromadb(study_files_data, collection_name)
+
+
+def add_study_files_data_to_chromadb(
+    study_files_data: Dict[str, str], collection_name: str
+):
+    """
+    Adds already loaded study files data to the specified ChromaDB collection.
+
+    :param study_files_data: Mapping of study names to their JSON file paths.
+    :param collection_name: Name of the ChromaDB collection to store the data.
+    """
     if not study_files_data:
         return
 
@@ -8,6 +8,7 @@ import re
 from typing import Dict, List, Optional
 
 import fitz
+import orjson
 from langchain import PromptTemplate
 from langchain.chains.summarize import load_summarize_chain
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -15,6 +16,8 @@ from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader, Te
 from langchain_openai import ChatOpenAI
 from slugify import slugify
 
+from utils.variables import parse_variables
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,13 +91,36 @@ class PDFProcessor:
 
     def prepare_variables(self, variables: str):
         """Prepare variables for processing."""
-        if variables:
-            # Clean and format variable names
-            self.var_list = [v.strip().upper() for v in variables.split(",")]
-            self.formatted_vars = "\n".join(f"- {var}" for var in self.var_list)
-        else:
-            self.var_list = []
-            self.formatted_vars = ""
+        # Clean and format variable names
+        self.var_list = parse_variables(variables)
+        self.formatted_vars = "\n".join(f"- {var}" for var in self.var_list)
+
+    def process_pdf(self, file_path: str, variables: str = "") -> Optional[Dict]:
+        """Load, summarise and extract the JSON data of a single PDF file."""
+        try:
+            # Load and chunk the document
+            pdf_data = load_document(file_path)
+            pdf_chunks = chunk_data(
+                pdf_data,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+            )
+
+            # Generate summary using the stuff chain
+            output_summary = self.summarize_document(pdf_chunks, variables)
+
+            # Extract JSON data
+            try:
+                json_data = self.extract_json_from_text(output_summary["output_text"])
+            except ValueError:
+                # If JSON extraction fails, create a basic structure
+                json_data = self.create_basic_document_structure(file_path, pdf_data)
+
+            logger.info(f"Successfully processed {file_path}")
+            return json_data
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {str(e)}")
+            return None
 
     def process_pdfs(
         self, file_paths: List[str], collection_name: str, variables: str = ""
@@ -105,34 +131,9 @@ class PDFProcessor:
 
         processed_docs = []
         for file_path in file_paths:
-            try:
-                # Load and chunk the document
-                pdf_data = load_document(file_path)
-                pdf_chunks = chunk_data(
-                    pdf_data,
-                    chunk_size=self.chunk_size,
-                    chunk_overlap=self.chunk_overlap,
-                )
-
-                # Generate summary using the stuff chain
-                output_summary = self.summarize_document(pdf_chunks, variables)
-
-                # Extract JSON data
-                try:
-                    json_data = self.extract_json_from_text(
-                        output_summary["output_text"]
-                    )
-                except ValueError:
-                    # If JSON extraction fails, create a basic structure
-                    json_data = self.create_basic_document_structure(
-                        file_path, pdf_data
-                    )
-
+            json_data = self.process_pdf(file_path, variables)
+            if json_data is not None:
                 processed_docs.append(json_data)
-                logger.info(f"Successfully processed {file_path}")
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {str(e)}")
-                continue
 
         if not processed_docs:
             raise ValueError("No documents were successfully processed")
@@ -143,8 +144,8 @@ class PDFProcessor:
         output_path = os.path.join("data", output_filename)
 
         os.makedirs("data", exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(processed_docs, f, indent=2, ensure_ascii=False)
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(processed_docs, option=orjson.OPT_INDENT_2))
 
         logger.info(f"Saved processed documents to {output_path}")
         return output_path
@@ -238,22 +239,23 @@ Skip the References section when generating the summary.
 
         json_str = json_match.group(1)
         try:
-            data = json.loads(json_str)
-        except json.JSONDecodeError:
+            data = orjson.loads(json_str)
+        except orjson.JSONDecodeError:
             data = {}
 
         return data
 
     def create_basic_document_structure(self, file_path, pdf_data):
         """Create a basic document structure when JSON extraction fails."""
-        doc = fitz.open(file_path)
+        with fitz.open(file_path) as doc:
+            first_page_text = doc[0].get_text()
+            page_count = len(doc)
 
         # Extract basic metadata
         title = os.path.basename(file_path)
-        content = "\n".join([page.get_text() for page in pdf_data])
+        content = "\n".join([page.page_content for page in pdf_data])
 
         # Try to extract title from first page
-        first_page_text = doc[0].get_text()
         title_match = re.search(r"^(.+?)\n", first_page_text)
         if title_match:
             title = title_match.group(1).strip()
@@ -262,6 +264,6 @@ Skip the References section when generating the summary.
             "title": title,
             "source_file": file_path,
             "content": content,
-            "page_count": len(doc),
+            "page_count": page_count,
             "processed_date": datetime.datetime.now().isoformat(),
         }
@@ -0,0 +1,89 @@
+# utils/session_store.py
+
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import orjson
+from cachetools import LRUCache
+
+
+class SQLiteSessionStore:
+    """
+    Session data shared by all worker processes through a SQLite file.
+
+    It supports the subset of the TTLCache interface the API uses for sessions
+    (``get`` and item assignment), so either can back the session cache. Entries
+    expire ``ttl`` seconds after they were last written.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        # sqlite3 connections cannot be shared between threads
+        self.local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "token TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            # Readers in other workers are not blocked while a session is written
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, token: str, default: Optional[Any] = None) -> Optional[Any]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT data FROM sessions WHERE token = ? AND expires_at > ?",
+                (token, time.time()),
+            )
+            .fetchone()
+        )
+        return orjson.loads(row[0]) if row else default
+
+    def __setitem__(self, token: str, data: Any) -> None:
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO sessions (token, data, expires_at) VALUES (?, ?, ?)",
+            (token, orjson.dumps(data), now + self.ttl),
+        )
+        # Drop expired sessions so the table stays bounded like the TTLCache
+        connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+
+class LockedLRUCache(LRUCache):
+    """
+    LRUCache that can be shared by handler threads.
+
+    Reading an LRUCache reorders it, so reads as well as writes are serialised.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.lock = threading.RLock()
+
+    def __getitem__(self, key: Any) -> Any:
+        with self.lock:
+            return super().__getitem__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self.lock:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        with self.lock:
+            super().__delitem__(key)
+
+    def get(self, key: Any, default: Optional[Any] = None) -> Optional[Any]:
+        # Checking and reading must happen together, or the entry may be evicted
+        # in between
+        with self.lock:
+            return super().get(key, default)
@@ -0,0 +1,23 @@
+# utils/variables.py
+
+import re
+from typing import List
+
+# Separator between comma-separated study variables, with surrounding spaces
+VARIABLE_SEPARATOR_RE = re.compile(r"\s*,\s*")
+
+
+def parse_variables(text: str) -> List[str]:
+    """
+    Splits a comma-separated list of study variables into upper-cased names.
+
+    Example:
+        parse_variables(" age, sex ,, country") returns ["AGE", "SEX", "COUNTRY"].
+    """
+    if not text:
+        return []
+    return [
+        variable
+        for variable in VARIABLE_SEPARATOR_RE.split(text.strip().upper())
+        if variable
+    ]
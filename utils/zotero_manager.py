@@ -1,9 +1,9 @@
 # utils/zotero_manager.py
 
-import json
 import os
 from typing import Any, Dict, List, Optional
 
+import orjson
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from pyzotero import zotero
@@ -157,8 +157,20 @@ class ZoteroManager:
     '''
 
     def __init__(self, library_id: str, library_type: str, api_key: str):
+        self.library_id = library_id
+        self.library_type = library_type
+        self.api_key = api_key
         self.zot = zotero.Zotero(library_id, library_type, api_key)
 
+    def copy(self) -> "ZoteroManager":
+        """
+        Creates a ZoteroManager for the same library with its own pyzotero client.
+
+        pyzotero keeps per-request state on the client, so threads working on the
+        same library each need their own copy.
+        """
+        return ZoteroManager(self.library_id, self.library_type, self.api_key)
+
     def create_zotero_item_from_json(self, json_obj: Dict[str, Any]) -> ZoteroItem:
         """
         Creates a ZoteroItem instance from a JSON object.
@@ -460,8 +472,8 @@ class ZoteroManager:
         Returns:
             None
         """
-        with open(file_path, "w") as json_file:
-            json.dump(zotero_items_json, json_file, indent=2)
+        with open(file_path, "wb") as json_file:
+            json_file.write(orjson.dumps(zotero_items_json, option=orjson.OPT_INDENT_2))
 
     def get_item_full_text(self, key: str) -> Optional[dict]:
         """
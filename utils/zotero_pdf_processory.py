@@ -1,19 +1,27 @@
 # utils/zotero_pdf_processor.py
+import hashlib
 import json
 import logging
 import os
 import re
+import threading
 import time
 import traceback
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
 
+import orjson
 import pandas as pd
 import requests
 import tiktoken
+from cachetools import LRUCache
 from langchain import PromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader, TextLoader
+from langchain_community.document_loaders.blob_loaders import Blob
+from langchain_community.document_loaders.parsers import PyPDFParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from openai import OpenAI
@@ -24,6 +32,29 @@ from slugify import slugify
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extraction results keyed by PDF content and request parameters, so re-uploads
+# of the same document skip the LLM calls. Frames are held by reference in this
+# process; nothing is pickled on the way in or out.
+pdf_result_cache = LRUCache(maxsize=256)
+pdf_result_cache_lock = threading.Lock()
+
+# Bounds the LLM calls in flight across all concurrent uploads, not just within
+# one batch, to stay under the provider's rate limits
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "8"))
+llm_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_LLM_CALLS)
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    """Returns a shared OpenAI client so HTTP connections are reused across calls."""
+    return OpenAI()
+
+
+@lru_cache(maxsize=1)
+def get_summary_llm() -> ChatOpenAI:
+    """Returns a shared chat model used for document summarisation."""
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
 
 def num_tokens_from_string(string: str, encoding_name: str = "gpt-4o-mini") -> int:
     """Returns the number of tokens in a text string."""
@@ -51,7 +82,7 @@ def load_document(file: str) -> Optional[List]:
         if extension not in loaders:
             raise ValueError(f"Unsupported document format: {extension}")
 
-        print(f"Loading {file}")
+        logger.debug("Loading %s", file)
         loader = loaders[extension](file)
         docs = loader.load()
     except Exception as e:
@@ -61,6 +92,25 @@ def load_document(file: str) -> Optional[List]:
     return docs
 
 
+class PdfUpload(NamedTuple):
+    """An uploaded PDF kept in memory instead of being written to disk."""
+
+    name: str
+    data: bytes
+
+
+def load_pdf_upload(upload: PdfUpload) -> List:
+    """Parses an in-memory PDF the same way PyPDFLoader parses a file."""
+    try:
+        blob = Blob.from_data(
+            upload.data, path=upload.name, mime_type="application/pdf"
+        )
+        return PyPDFParser().parse(blob)
+    except Exception as e:
+        logger.error(str(e))
+        return []
+
+
 def extract_variables(text: str, variables: str, model="gpt-4o-mini"):
     """
     Extracts specified variables from the given text using OpenAI's GPT model.
@@ -88,7 +138,7 @@ def extract_variables(text: str, variables: str, model="gpt-4o-mini"):
     - Do not return variable names if they are not found in the text.
     """
 
-    client = OpenAI()
+    client = get_openai_client()
     response = client.chat.completions.create(
         model=model,
         messages=[
@@ -105,9 +155,9 @@ def extract_variables(text: str, variables: str, model="gpt-4o-mini"):
 
     try:
         # Ensure valid JSON
-        json.loads(extracted_data)
+        orjson.loads(extracted_data)
         return extracted_data
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return "{}"  # Return an empty JSON if parsing fails
 
 
@@ -122,8 +172,8 @@ def extract_json_from_text(text):
         dict: A dictionary representation of the JSON data.
     """
     try:
-        data = json.loads(text)
-    except json.JSONDecodeError as e:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError as e:
         # raise ValueError(f"Invalid JSON content: {e}")
         data = {}
 
@@ -141,9 +191,15 @@ def json_to_dataframe(json_data):
         pd.DataFrame: A DataFrame representation of the JSON data.
     """
     if isinstance(json_data, dict):
-        # Flatten nested dictionaries if any
+        # Flatten nested dictionaries if any. Summary columns keep their
+        # dictionaries, as update_summary_columns turns them into Markdown
+        # directly instead of parsing them back from JSON.
         flat_data = {
-            k: (v if not isinstance(v, dict) else json.dumps(v))
+            k: (
+                json.dumps(v)
+                if isinstance(v, dict) and "summary" not in k.lower()
+                else v
+            )
             for k, v in json_data.items()
         }
         df = pd.DataFrame([flat_data])
@@ -163,64 +219,157 @@ def pretty_print_json(json_data):
     print(json.dumps(json_data, indent=4))
 
 
-def process_multiple_pdfs(
-    file_paths, variables, summarization_function, chunk_size=10000, chunk_overlap=100
+def source_name(file_path):
+    """Returns the file name of a path or PdfUpload, for logging."""
+    if isinstance(file_path, PdfUpload):
+        return file_path.name
+    return os.path.basename(file_path)
+
+
+def split_document(file_path, chunk_size, chunk_overlap):
+    """Loads a document and splits it into chunks; returns an empty list on failure."""
+    if isinstance(file_path, PdfUpload):
+        pdf_data = load_pdf_upload(file_path)
+    else:
+        pdf_data = load_document(file_path)
+    if not pdf_data:
+        return []
+    return chunk_data(pdf_data, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def process_pdf(
+    file_path, variables, summarization_function, chunk_size=10000, chunk_overlap=100
 ):
     """
-    Processes multiple PDF files and returns a combined DataFrame of extracted information.
+    Processes a single PDF file and returns a DataFrame of extracted information.
 
     Args:
-        file_paths (list): A list of file paths to PDF files.
+        file_path (str or PdfUpload): Path to the PDF file, or an uploaded PDF held in memory.
         variables (str): A comma-separated string of variables to extract and summarize from the PDF content.
-        summarization_function (function): A function that takes PDF chunks and variables as input and returns summarized JSON data.
+        summarization_function (function): A function that takes PDF chunks and variables as input
+            and returns summarized JSON data.
         chunk_size (int, optional): The size of each chunk for splitting the PDF content. Default is 10000.
         chunk_overlap (int, optional): The overlap size between chunks. Default is 100.
 
     Returns:
-        pd.DataFrame: A combined DataFrame containing extracted and summarized data from all PDF files.
+        pd.DataFrame or None: The extracted data, or None if nothing could be extracted.
     """
-    combined_data = []
+    start_time = time.time()
+    # Load the PDF document and split it into chunks
+    pdf_chunks = split_document(file_path, chunk_size, chunk_overlap)
+    if not pdf_chunks:
+        return None
+
+    # Summarize the document data
+    with llm_call_slots:
+        output_summary = summarization_function(pdf_chunks, variables)
+    # logger.info(f"Summary text: {output_summary_json}")
 
-    for file_path in file_paths:
-        start_time = time.time()
-        # Load the PDF document
-        pdf_data = load_document(file_path)
-        if not pdf_data:
-            continue
+    # Extract JSON data from the summary text
+    with llm_call_slots:
+        json_text = extract_variables(output_summary, variables)
+    json_data = extract_json_from_text(json_text)
 
-        # Split the PDF data into chunks
-        pdf_chunks = chunk_data(
-            pdf_data, chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
+    # Convert JSON data to DataFrame
+    df = json_to_dataframe(json_data) if json_data else None
 
-        # Summarize the document data
-        output_summary = summarization_function(pdf_chunks, variables)
-        # logger.info(f"Summary text: {output_summary_json}")
+    end_time = time.time()
 
-        # Extract JSON data from the summary text
-        json_text = extract_variables(output_summary, variables)
-        json_data = extract_json_from_text(json_text)
+    elapsed_time = end_time - start_time
+    minutes = int(elapsed_time // 60)
+    seconds = int(elapsed_time % 60)
 
-        # Convert JSON data to DataFrame
-        if json_data:
-            df = json_to_dataframe(json_data)
+    file_name = source_name(file_path)
+    logger.info(
+        f"Elapsed time to process {file_name} document: {minutes} minutes and {seconds} seconds"
+    )
 
-            # Add a column to identify the source file
-            # df["Source_File"] = file_path
+    return df
 
-            # Append the DataFrame to the combined data
-            combined_data.append(df)
 
-        end_time = time.time()
+def file_digest(file_path):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
 
-        elapsed_time = end_time - start_time
-        minutes = int(elapsed_time // 60)
-        seconds = int(elapsed_time % 60)
 
-        file_name = os.path.basename(file_path)
-        logger.info(
-            f"Elapsed time to process {file_name} document: {minutes} minutes and {seconds} seconds"
+def process_pdf_cached(file_path, variables, summarization_function, **kwargs):
+    """
+    Same as process_pdf, but reuses the result of an earlier run on identical file contents.
+
+    Args:
+        file_path (str or PdfUpload): Path to the PDF file, or an uploaded PDF held in memory.
+        variables (str): A comma-separated string of variables to extract and summarize from the PDF content.
+        summarization_function (function): A function that takes PDF chunks and variables as input
+            and returns summarized JSON data.
+        **kwargs: Chunking options passed on to process_pdf.
+
+    Returns:
+        pd.DataFrame or None: The extracted data, or None if nothing could be extracted.
+    """
+    try:
+        if isinstance(file_path, PdfUpload):
+            digest = hashlib.sha256(file_path.data).hexdigest()
+        else:
+            digest = file_digest(file_path)
+    except OSError:
+        # Let process_pdf log the unreadable file
+        return process_pdf(file_path, variables, summarization_function, **kwargs)
+
+    key = (digest, variables, summarization_function, tuple(sorted(kwargs.items())))
+    with pdf_result_cache_lock:
+        df = pdf_result_cache.get(key)
+    if df is not None:
+        logger.info(f"Reusing extracted data for {source_name(file_path)}")
+        return df
+
+    df = process_pdf(file_path, variables, summarization_function, **kwargs)
+    if df is not None:
+        with pdf_result_cache_lock:
+            pdf_result_cache[key] = df
+    return df
+
+
+def process_multiple_pdfs(
+    file_paths,
+    variables,
+    summarization_function,
+    chunk_size=10000,
+    chunk_overlap=100,
+    max_workers=8,
+):
+    """
+    Processes multiple PDF files and returns a combined DataFrame of extracted information.
+
+    The files are processed concurrently in a thread pool since each one is dominated
+    by network calls to the LLM. Files that were already processed with the same variables are served from
+    an in-memory cache.
+
+    Args:
+        file_paths (list): A list of file paths to PDF files, or PdfUpload objects for PDFs held in memory.
+        variables (str): A comma-separated string of variables to extract and summarize from the PDF content.
+        summarization_function (function): A function that takes PDF chunks and variables as input
+            and returns summarized JSON data.
+        chunk_size (int, optional): The size of each chunk for splitting the PDF content. Default is 10000.
+        chunk_overlap (int, optional): The overlap size between chunks. Default is 100.
+        max_workers (int, optional): Maximum number of PDFs processed at the same time. Default is 8.
+
+    Returns:
+        pd.DataFrame: A combined DataFrame containing extracted and summarized data from all PDF files.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda file_path: process_pdf_cached(
+                file_path,
+                variables,
+                summarization_function,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            ),
+            file_paths,
         )
+        # Keep the input order of the files
+        combined_data = [df for df in results if df is not None]
 
     # Combine all DataFrames into a single DataFrame
     combined_df = pd.concat(combined_data, ignore_index=True)
@@ -276,8 +425,8 @@ def update_summary_columns(df):
         # Parse JSON string to dict if it's a string
         if isinstance(json_data, str):
             try:
-                json_data = json.loads(json_data)
-            except json.JSONDecodeError:
+                json_data = orjson.loads(json_data)
+            except orjson.JSONDecodeError:
                 # Return the original string if it's not valid JSON
                 return json_data
 
@@ -291,14 +440,27 @@ def update_summary_columns(df):
     # Identify columns with 'summary' in their name
     summary_columns = [col for col in df.columns if "summary" in col.lower()]
 
-    # Apply the processing function to each matching column
+    # Apply the processing function to each matching column. Cells often repeat
+    # placeholders such as "Not Available", so each distinct string is only
+    # parsed once per column.
     for column_name in summary_columns:
-        df[column_name] = df[column_name].apply(process_column_data)
+        converted = {}
+
+        def convert(value):
+            if not isinstance(value, str):
+                return process_column_data(value)
+            if value not in converted:
+                converted[value] = process_column_data(value)
+            return converted[value]
+
+        df[column_name] = df[column_name].map(convert)
 
     return df
 
 
-def export_dataframe_to_csv(df, file_path, index=False):
+def export_dataframe_to_csv(
+    df, file_path, index=False, chunksize=None, compression="infer"
+):
     """
     Exports a DataFrame to a CSV file.
 
@@ -306,13 +468,16 @@ def export_dataframe_to_csv(df, file_path, index=False):
         df (pd.DataFrame): The DataFrame to export.
         file_path (str): The file path where the CSV will be saved.
         index (bool, optional): Whether to include the DataFrame index in the CSV file. Default is False.
+        chunksize (int, optional): Number of rows formatted and written at a time. Default writes in one go.
+        compression (str, optional): Compression for the output file, e.g. "gzip". Default infers it from
+            the file extension.
 
     Returns:
         str: A success message indicating the file has been saved.
     """
     try:
         # Export the DataFrame to CSV
-        df.to_csv(file_path, index=index)
+        df.to_csv(file_path, index=index, chunksize=chunksize, compression=compression)
         return f"DataFrame successfully exported to {file_path}."
     except Exception as e:
         # Handle exceptions and return error message
@@ -356,7 +521,9 @@ def chunk_data(data, chunk_size=256, chunk_overlap=20):
     return chunks
 
 
-def stuff_summarise_document_bullets(docs, variables):
+@lru_cache(maxsize=1)
+def get_summary_chain():
+    """Builds the bullet-point summarisation chain once and reuses it for every document."""
     system_prompt = """
     You are an expert research document summarizer. Your goal is to read and summarize 
     the content of the provided text in a structured, bullet-point format 
@@ -392,13 +559,15 @@ def stuff_summarise_document_bullets(docs, variables):
         [("system", system_prompt), ("human", human_message_template.template)]
     )
 
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    llm = get_summary_llm()
 
     # Instantiate chain
-    chain = create_stuff_documents_chain(llm, prompt)
+    return create_stuff_documents_chain(llm, prompt)
 
+
+def stuff_summarise_document_bullets(docs, variables):
     # Invoke chain
-    result = chain.invoke({"context": docs, "variables": variables})
+    result = get_summary_chain().invoke({"context": docs, "variables": variables})
     return result
 
 
@@ -486,21 +655,45 @@ def get_zotero_collection_items(zotero_manager, collection_key):
     return zotero_collection_items
 
 
+def download_collection_item_attachment_pdf(zotero_manager, collection_item):
+    """
+    Downloads the first attachment of a Zotero item as a PDF.
+
+    Returns:
+        Optional[str]: Path to the saved file, or None if the item has no attachments.
+    """
+    collection_item_children = zotero_manager.get_item_children(collection_item.key)
+    if not collection_item_children:
+        return None
+
+    key = collection_item_children[0]["key"]
+    file_name = slugify(collection_item_children[0]["data"]["filename"])
+    directory = "zotero_data"
+    filename = f"{file_name}.pdf"
+    file_path = download_file_from_zotero(zotero_manager, key, directory, filename)
+    logger.info(f"File saved at: {file_path}")
+    return file_path
+
+
 def down_zotero_collection_item_attachment_pdfs(
-    zotero_manager, zotero_collection_items
+    zotero_manager, zotero_collection_items, max_workers=8
 ):
-    file_paths = []
-    for collection_item in zotero_collection_items:
-        collection_item_children = zotero_manager.get_item_children(collection_item.key)
-        if collection_item_children:
-            key = collection_item_children[0]["key"]
-            file_name = slugify(collection_item_children[0]["data"]["filename"])
-            directory = "zotero_data"
-            filename = f"{file_name}.pdf"
-            file_path = download_file_from_zotero(
-                zotero_manager, key, directory, filename
-            )
-            logger.info(f"File saved at: {file_path}")
-            file_paths.append(file_path)
+    """
+    Downloads the attachment PDFs of the given Zotero items concurrently.
+
+    Each item needs two round-trips to the Zotero API (its children, then the
+    file), so up to max_workers items are downloaded at the same time, each
+    worker thread with its own copy of zotero_manager. File paths are returned in
+    the order of the items.
+    """
+    thread_state = threading.local()
+
+    def download(collection_item):
+        manager = getattr(thread_state, "zotero_manager", None)
+        if manager is None:
+            manager = thread_state.zotero_manager = zotero_manager.copy()
+        return download_collection_item_attachment_pdf(manager, collection_item)
 
-    return file_paths
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        file_paths = executor.map(download, zotero_collection_items)
+        return [file_path for file_path in file_paths if file_path]